@@ -0,0 +1,554 @@
+"""Local load-test harness for healthify.py
+
+Starts healthify.py on a local headless Streamlit server and drives many
+websocket sessions against it at the same time, one per simulated
+receptionist. Each session speaks the same protocol as the browser
+frontend: it navigates with the sidebar selectbox, submits
+appointment_form and patient_record_form, and types into the patient
+record search box.
+
+All sessions are connected and running their journeys simultaneously, so
+the server runs every session as a script thread inside its single
+process, exactly as it would for real users sharing the GIL, memory and
+session state heap. The sessions themselves are asyncio tasks in this
+process. No browser or external service is needed.
+
+Usage:
+    python loadtest.py --sessions 200 --journeys 10
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+try:
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+except ImportError as e:
+    print(f"❌ Failed to import streamlit: {e}")
+    print("Please run: pip install 'streamlit>=1.28.0'")
+    sys.exit(1)
+
+# Only recent Streamlit releases depend on websockets
+try:
+    import websockets
+except ImportError as e:
+    print(f"❌ Failed to import websockets: {e}")
+    print("Please run: pip install websockets")
+    sys.exit(1)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "healthify.py")
+
+APPOINTMENT_PAGE = "📅 Book Appointment"
+RECORDS_PAGE = "📋 Patient Records"
+HOME_PAGE = "🏠 Home"
+
+FIRST_NAMES = ["Asha", "Ravi", "Maria", "John", "Wei", "Fatima", "Liam", "Priya", "Omar", "Sara"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Chen", "Khan", "Patel", "Brown", "Nguyen", "Reddy", "Lee"]
+
+# Relative weight of each journey in the simulated workload
+JOURNEY_WEIGHTS = {
+    "book_appointment": 4,
+    "add_record": 3,
+    "search_records": 3,
+}
+
+# Seconds to wait for the server to answer its health check
+SERVER_START_TIMEOUT = 60
+
+ALERT_ERROR = 1
+ALERT_SUCCESS = 4
+
+
+class HarnessError(Exception):
+    """Raised when the harness cannot drive the app as scripted"""
+
+
+def free_port():
+    """Ask the OS for a free local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_rss_mb(pid):
+    """Return the current resident memory of a process in MB, or None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    # No /proc (macOS and other Unixes): ask ps, which also reports current RSS in kB
+    try:
+        output = subprocess.run(
+            ["ps", "-o", "rss=", "-p", str(pid)],
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+        return int(output) / 1024 if output else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def start_server(port, log_file):
+    """Launch healthify.py on a headless Streamlit server"""
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP_PATH,
+            "--server.headless", "true",
+            "--server.address", "127.0.0.1",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for_server(server, port, timeout):
+    """Block until the server answers its health check, failing fast if it exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise HarnessError(f"Streamlit server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise HarnessError(f"Streamlit server did not become healthy within {timeout:g} s")
+
+
+def stop_server(server):
+    """Terminate the server process"""
+    if server.poll() is None:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+class Session:
+    """One simulated receptionist with its own websocket session"""
+
+    def __init__(self, session_id, url, seed, timeout, think_time):
+        self.session_id = session_id
+        self.url = url
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.think_time = think_time
+        self.websocket = None
+        self.dropped = False
+        self.elements = []
+        self.widget_states = {}
+        self.patient_ids = []
+        self.latencies = defaultdict(list)
+        self.app_errors = defaultdict(int)
+        self.harness_errors = defaultdict(int)
+
+    async def connect(self):
+        """Open the websocket the browser frontend would use"""
+        self.websocket = await websockets.connect(
+            self.url,
+            subprotocols=["streamlit"],
+            max_size=None,
+            open_timeout=self.timeout,
+            ping_interval=None,
+        )
+
+    async def close(self):
+        """Close the websocket"""
+        if self.websocket is not None:
+            try:
+                await self.websocket.close()
+            except (websockets.ConnectionClosed, OSError):
+                pass
+
+    def find(self, element_type, label):
+        """Return the element of the last run with the given type and label"""
+        for kind, element in self.elements:
+            if kind == element_type and element.label == label:
+                return element
+        return None
+
+    def require(self, element_type, label):
+        """Like find, but a missing widget is a harness error"""
+        element = self.find(element_type, label)
+        if element is None:
+            raise HarnessError(f"No {element_type} labelled {label!r} on the current page")
+        return element
+
+    def alerts(self, alert_format):
+        """Return the bodies of alerts with the given format from the last run"""
+        return [element.body for kind, element in self.elements
+                if kind == "alert" and element.format == alert_format]
+
+    async def rerun(self, trigger_id=None):
+        """Send the current widget states, then collect the new page until the script finishes"""
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.SetInParent()
+        for widget_id, (field, value) in self.widget_states.items():
+            widget = client_state.widget_states.widgets.add()
+            widget.id = widget_id
+            setattr(widget, field, value)
+        if trigger_id is not None:
+            widget = client_state.widget_states.widgets.add()
+            widget.id = trigger_id
+            widget.trigger_value = True
+        await self.websocket.send(message.SerializeToString())
+
+        elements = []
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.websocket.recv())
+            kind = reply.WhichOneof("type")
+            if kind == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element_type = reply.delta.new_element.WhichOneof("type")
+                elements.append((element_type, getattr(reply.delta.new_element, element_type)))
+            elif kind == "script_finished":
+                if reply.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    elements = []
+                    continue
+                self.elements = elements
+                # Like the frontend, forget the state of widgets that are no longer on the page
+                live_ids = {getattr(element, "id", None) for _, element in elements}
+                self.widget_states = {widget_id: state for widget_id, state in self.widget_states.items()
+                                      if widget_id in live_ids}
+                return reply.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY
+
+    async def step(self, action, prepare=None, expect_success=False):
+        """Apply an interaction, rerun the script and record the outcome
+
+        Returns True when the rerun finished without an app error. Widgets
+        that cannot be found and broken connections count as harness
+        errors; exceptions, st.error alerts and missing success alerts
+        count as app errors. A timeout or broken connection drops the
+        session, since replies to the abandoned rerun may still be queued
+        on the socket.
+        """
+        if self.dropped:
+            return False
+        if self.think_time:
+            await asyncio.sleep(self.rng.uniform(0, self.think_time))
+        started = time.perf_counter()
+        try:
+            trigger_id = prepare() if prepare is not None else None
+            finished = await asyncio.wait_for(self.rerun(trigger_id), self.timeout)
+        except HarnessError:
+            self.harness_errors[action] += 1
+            return False
+        except (asyncio.TimeoutError, websockets.ConnectionClosed, OSError):
+            self.harness_errors[action] += 1
+            self.dropped = True
+            await self.close()
+            return False
+        self.latencies[action].append(time.perf_counter() - started)
+
+        failed = not finished or any(kind == "exception" for kind, _ in self.elements)
+        failed = failed or bool(self.alerts(ALERT_ERROR))
+        if expect_success and not self.alerts(ALERT_SUCCESS):
+            failed = True
+        if failed:
+            self.app_errors[action] += 1
+        return not failed
+
+    def set_text(self, label, value):
+        """Type into a text input on the current page"""
+        self.widget_states[self.require("text_input", label).id] = ("string_value", value)
+
+    def navigate(self, page_label):
+        """Switch pages through the sidebar selectbox"""
+        def prepare():
+            selectbox = self.require("selectbox", "Navigate to:")
+            # Streamlit 1.40+ sends the option itself, older versions send its index
+            if "raw_value" in selectbox.DESCRIPTOR.fields_by_name:
+                self.widget_states[selectbox.id] = ("string_value", page_label)
+            else:
+                self.widget_states[selectbox.id] = ("int_value", list(selectbox.options).index(page_label))
+        return self.step("navigate", prepare)
+
+    def submit_form(self, action, fields, submit_label):
+        """Fill text inputs by label, then press the form submit button"""
+        def prepare():
+            for label, value in fields.items():
+                self.set_text(label, value)
+            button = self.require("button", submit_label)
+            if not button.form_id:
+                raise HarnessError(f"Button {submit_label!r} is not a form submit button")
+            return button.id
+        return self.step(action, prepare, expect_success=True)
+
+    def random_name(self):
+        """Build a random patient name"""
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    async def book_appointment(self):
+        """Navigate to the booking page and submit appointment_form"""
+        if not await self.navigate(APPOINTMENT_PAGE):
+            return "failed"
+        name = self.random_name()
+        booked = await self.submit_form("submit_appointment", {
+            "Full Name*": name,
+            "Phone Number*": f"555-{self.rng.randint(1000000, 9999999)}",
+            "Email Address*": f"{name.replace(' ', '.').lower()}@example.com",
+        }, "Book Appointment")
+        return "completed" if booked else "failed"
+
+    async def add_record(self):
+        """Navigate to patient records and submit patient_record_form"""
+        if not await self.navigate(RECORDS_PAGE):
+            return "failed"
+        patient_id = f"P{self.session_id:03d}-{len(self.patient_ids) + 1:04d}"
+        added = await self.submit_form("submit_record", {
+            "Patient Name*": self.random_name(),
+            "Patient ID*": patient_id,
+            "Allergies (comma-separated)": self.rng.choice(["", "Penicillin", "Peanuts, Dust"]),
+        }, "Add Record")
+        if not added:
+            return "failed"
+        self.patient_ids.append(patient_id)
+        return "completed"
+
+    async def search_records(self):
+        """Navigate to patient records and type into the search box"""
+        # The search box is only rendered once the session has records, so add one first
+        if not self.patient_ids:
+            if await self.add_record() != "completed":
+                return "failed"
+        elif not await self.navigate(RECORDS_PAGE):
+            return "failed"
+        if self.patient_ids and self.rng.random() < 0.5:
+            term = self.rng.choice(self.patient_ids)
+        else:
+            term = self.rng.choice(LAST_NAMES)
+        searched = await self.step("search", lambda: self.set_text("Search by patient name or ID:", term))
+        return "completed" if searched else "failed"
+
+    async def run_journey(self):
+        """Run one randomly chosen journey and return to the home page"""
+        journey = self.rng.choices(list(JOURNEY_WEIGHTS), weights=list(JOURNEY_WEIGHTS.values()))[0]
+        status = await getattr(self, journey)()
+        await self.navigate(HOME_PAGE)
+        return journey, status
+
+
+async def sample_memory(pids, samples, started, interval):
+    """Record (elapsed seconds, RSS MB) pairs for each process until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        elapsed = time.perf_counter() - started
+        for name, pid in pids.items():
+            rss = await loop.run_in_executor(None, read_rss_mb, pid)
+            if rss is not None:
+                samples[name].append((elapsed, rss))
+        await asyncio.sleep(interval)
+
+
+async def drive_session(session, args, started, outcomes):
+    """Run journeys for one session until it is done or time is up"""
+    for _ in range(args.journeys):
+        if session.dropped or (args.duration and time.perf_counter() - started >= args.duration):
+            break
+        journey, status = await session.run_journey()
+        outcomes[journey][status] += 1
+
+
+async def run_load(args, url, server_pid):
+    """Connect every session, run the journeys concurrently and collect results"""
+    sessions = [Session(sid, url, args.seed + sid, args.timeout, args.think_time)
+                for sid in range(args.sessions)]
+
+    # Connect and load every session before the clock starts so startup is not measured as load
+    async def open_session(session):
+        try:
+            await session.connect()
+        except (asyncio.TimeoutError, websockets.InvalidHandshake, OSError):
+            session.harness_errors["initial_load"] += 1
+            return False
+        return await session.step("initial_load")
+
+    loaded = await asyncio.gather(*(open_session(session) for session in sessions))
+    if not any(loaded):
+        raise HarnessError("No session could load the app")
+    live_sessions = [session for session, ok in zip(sessions, loaded) if ok]
+    print(f"⏱️  {len(live_sessions)}/{len(sessions)} sessions loaded, running journeys...")
+
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(
+        {"server": server_pid, "loadgen": os.getpid()}, samples, started, args.sample_interval))
+
+    outcomes = defaultdict(lambda: defaultdict(int))
+    await asyncio.gather(*(drive_session(session, args, started, outcomes) for session in live_sessions))
+    wall_time = time.perf_counter() - started
+
+    sampler.cancel()
+    try:
+        await sampler
+    except asyncio.CancelledError:
+        pass
+    for name, pid in (("server", server_pid), ("loadgen", os.getpid())):
+        rss = read_rss_mb(pid)
+        if rss is not None:
+            samples[name].append((wall_time, rss))
+
+    await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+    return {
+        "sessions": sessions,
+        "live_sessions": len(live_sessions),
+        "dropped_sessions": sum(session.dropped for session in live_sessions),
+        "outcomes": outcomes,
+        "memory": samples,
+        "wall_time": wall_time,
+    }
+
+
+def print_report(results, args, server_pid):
+    """Print throughput, latency percentiles and memory growth"""
+    latencies = defaultdict(list)
+    app_errors = defaultdict(int)
+    harness_errors = defaultdict(int)
+    for session in results["sessions"]:
+        for action, values in session.latencies.items():
+            latencies[action].extend(values)
+        for action, count in session.app_errors.items():
+            app_errors[action] += count
+        for action, count in session.harness_errors.items():
+            harness_errors[action] += count
+
+    # Startup is reported on its own so it does not skew the load figures
+    load_values = sorted(latencies.pop("initial_load", []))
+    load_failures = app_errors.pop("initial_load", 0) + harness_errors.pop("initial_load", 0)
+
+    wall_time = results["wall_time"]
+    outcomes = results["outcomes"]
+    total_reruns = sum(len(values) for values in latencies.values())
+    completed = sum(counts["completed"] for counts in outcomes.values())
+
+    print("\n" + "=" * 80)
+    print(f"🏥 HealthCare Plus load test — {results['live_sessions']} concurrent websocket sessions")
+    print(f"   against one Streamlit server process (pid {server_pid})")
+    print("=" * 80)
+
+    print("\n### Startup")
+    print(f"Sessions loaded: {results['live_sessions']}/{args.sessions} ({load_failures} failed)")
+    print(f"Load latency:    p50 {percentile(load_values, 50) * 1000:.1f} ms,"
+          f" max {(load_values[-1] if load_values else 0) * 1000:.1f} ms")
+
+    print("\n### Throughput")
+    print(f"Wall time:       {wall_time:.1f} s")
+    print(f"Sessions dropped after a timeout or lost connection: {results['dropped_sessions']}")
+    print(f"Script reruns:   {total_reruns} ({total_reruns / wall_time:.1f} reruns/s)")
+    print(f"Journeys done:   {completed} ({completed / wall_time:.2f} journeys/s)")
+    print(f"{'journey':<20}{'completed':>11}{'failed':>9}")
+    for journey in sorted(outcomes):
+        counts = outcomes[journey]
+        print(f"{journey:<20}{counts['completed']:>11}{counts['failed']:>9}")
+
+    print("\n### Latency per script rerun (ms)")
+    print(f"{'action':<20}{'count':>7}{'app_err':>9}{'harn_err':>9}"
+          f"{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    actions = sorted(set(latencies) | set(app_errors) | set(harness_errors))
+    rows = [(action, sorted(latencies[action]), app_errors[action], harness_errors[action]) for action in actions]
+    rows.append(("all", sorted(v for action in actions for v in latencies[action]),
+                 sum(app_errors.values()), sum(harness_errors.values())))
+    for action, values, app_count, harness_count in rows:
+        print(f"{action:<20}{len(values):>7}{app_count:>9}{harness_count:>9}"
+              + "".join(f"{percentile(values, p) * 1000:>9.1f}" for p in (50, 90, 95, 99))
+              + f"{(values[-1] if values else 0) * 1000:>9.1f}")
+
+    memory = results["memory"]
+    print("\n### Memory per process (current RSS MB)")
+    if not memory:
+        print("Memory sampling is unavailable on this platform (needs /proc or ps).")
+        return
+    print(f"{'process':<10}{'start':>10}{'peak':>10}{'end':>10}{'growth':>10}")
+    for name in sorted(memory):
+        rss = [value for _, value in memory[name]]
+        print(f"{name:<10}{rss[0]:>10.1f}{max(rss):>10.1f}{rss[-1]:>10.1f}{rss[-1] - rss[0]:>+10.1f}")
+
+    print(f"\n### Memory over time (current RSS MB, sampled every {args.sample_interval:g} s)")
+    names = sorted(memory)
+    print(f"{'t (s)':>8}" + "".join(f"{name:>10}" for name in names))
+    rows_count = min(args.timeline_rows, max(1, int(wall_time / args.sample_interval)))
+    for row in range(rows_count + 1):
+        t = wall_time * row / rows_count
+        line = f"{t:>8.1f}"
+        for name in names:
+            # Use the last sample taken at or before this point in time
+            value = memory[name][0][1]
+            for sample_time, rss in memory[name]:
+                if sample_time > t:
+                    break
+                value = rss
+            line += f"{value:>10.1f}"
+        print(line)
+    print()
+
+
+def main():
+    """Parse arguments, start the server, run the load and print the report"""
+    parser = argparse.ArgumentParser(description="Simulate concurrent clinic sessions against healthify.py")
+    parser.add_argument("--sessions", type=int, default=200, help="number of concurrent receptionist sessions")
+    parser.add_argument("--journeys", type=int, default=5, help="journeys per session")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--think-time", type=float, default=0,
+                        help="maximum random pause in seconds before each interaction (0 = none)")
+    parser.add_argument("--timeout", type=float, default=60, help="timeout per script rerun in seconds")
+    parser.add_argument("--port", type=int, default=0, help="port for the local server (0 = pick a free one)")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="memory sampling interval in seconds")
+    parser.add_argument("--timeline-rows", type=int, default=10, help="rows in the memory-over-time table")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible journeys")
+    args = parser.parse_args()
+
+    if args.sessions < 1 or args.journeys < 1 or args.timeline_rows < 1:
+        parser.error("--sessions, --journeys and --timeline-rows must be at least 1")
+    if args.timeout <= 0 or args.sample_interval <= 0:
+        parser.error("--timeout and --sample-interval must be greater than 0")
+    if args.duration < 0 or args.think_time < 0:
+        parser.error("--duration and --think-time cannot be negative")
+
+    port = args.port or free_port()
+    with tempfile.TemporaryFile() as server_log:
+        print(f"🚀 Starting Streamlit server on port {port}...")
+        server = start_server(port, server_log)
+        try:
+            wait_for_server(server, port, SERVER_START_TIMEOUT)
+            results = asyncio.run(run_load(args, f"ws://127.0.0.1:{port}/_stcore/stream", server.pid))
+        except HarnessError as e:
+            print(f"❌ {e}")
+            server_log.seek(0)
+            print(server_log.read().decode(errors="replace")[-2000:])
+            sys.exit(1)
+        finally:
+            stop_server(server)
+
+    print_report(results, args, server.pid)
+
+
+if __name__ == "__main__":
+    main()